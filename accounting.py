@@ -0,0 +1,268 @@
+"""
+Usage accounting module - tokens, STT seconds, TTS characters and tool output per session
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("accounting")
+
+USAGE_DIR = Path(os.getenv("USAGE_DIR", "usage"))
+USAGE_ROLLUP_INTERVAL = int(os.getenv("USAGE_ROLLUP_INTERVAL", "300"))
+
+# List prices in USD - adjust to the current contract
+PRICES = {
+    "prompt_token": 0.15 / 1_000_000,  # gpt-4o-mini input
+    "completion_token": 0.60 / 1_000_000,  # gpt-4o-mini output
+    "stt_second": 0.0043 / 60,  # Deepgram nova-2 per minute
+    "tts_character": 0.000065,  # Cartesia Sonic per character
+}
+
+# Tool output is fed back into the prompt, so a byte costs roughly a quarter token
+BYTES_PER_TOKEN = 4
+
+
+def _sessions_path() -> Path:
+    return USAGE_DIR / "sessions.jsonl"
+
+
+def _rollups_path() -> Path:
+    return USAGE_DIR / "rollups.json"
+
+
+def estimate_cost(usage: dict) -> float:
+    """USD cost of a session or rollup record"""
+    return (
+        usage.get("prompt_tokens", 0) * PRICES["prompt_token"]
+        + usage.get("completion_tokens", 0) * PRICES["completion_token"]
+        + usage.get("stt_seconds", 0.0) * PRICES["stt_second"]
+        + usage.get("tts_characters", 0) * PRICES["tts_character"]
+    )
+
+
+class UsageTracker:
+    """Tallies provider usage and tool output for a single session"""
+
+    def __init__(self, session_id: str, agent_type: str):
+        self.session_id = session_id
+        self.agent_type = agent_type
+        self.started_at = time.time()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.stt_seconds = 0.0
+        self.tts_characters = 0
+        self.llm_calls: list[dict] = []
+        self.tools: dict[str, dict] = {}
+
+    def record_llm(self, prompt_tokens: int, completion_tokens: int, request_id: str | None = None) -> None:
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.llm_calls.append({
+            "request_id": request_id,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+        })
+
+    def record_stt(self, seconds: float) -> None:
+        self.stt_seconds += seconds
+
+    def record_tts(self, characters: int) -> None:
+        self.tts_characters += characters
+
+    def record_tool(self, name: str, output: str | None) -> None:
+        stats = self.tools.setdefault(name, {"calls": 0, "output_bytes": 0})
+        stats["calls"] += 1
+        stats["output_bytes"] += len((output or "").encode())
+
+    def attach(self, session) -> "UsageTracker":
+        """Collect usage from the session's metrics and tool events"""
+        from livekit.agents import metrics
+
+        def _on_metrics(ev):
+            m = ev.metrics
+            if isinstance(m, metrics.LLMMetrics):
+                self.record_llm(m.prompt_tokens, m.completion_tokens, m.request_id)
+            elif isinstance(m, metrics.STTMetrics):
+                self.record_stt(m.audio_duration)
+            elif isinstance(m, metrics.TTSMetrics):
+                self.record_tts(m.characters_count)
+
+        def _on_tools(ev):
+            for call, output in zip(ev.function_calls, ev.function_call_outputs):
+                self.record_tool(call.name, output.output if output else None)
+
+        session.on("metrics_collected", _on_metrics)
+        session.on("function_tools_executed", _on_tools)
+        return self
+
+    def to_record(self) -> dict:
+        record = {
+            "session_id": self.session_id,
+            "agent_type": self.agent_type,
+            "started_at": self.started_at,
+            "duration": round(time.time() - self.started_at, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "stt_seconds": round(self.stt_seconds, 3),
+            "tts_characters": self.tts_characters,
+            "llm_calls": self.llm_calls,
+            "tools": self.tools,
+        }
+        record["cost_usd"] = round(estimate_cost(record), 6)
+        return record
+
+    def write(self) -> None:
+        """Append this session's usage to the local sessions log"""
+        USAGE_DIR.mkdir(parents=True, exist_ok=True)
+        with _sessions_path().open("a") as f:
+            f.write(json.dumps(self.to_record()) + "\n")
+
+
+def track_usage(ctx, session, agent_type: str) -> UsageTracker:
+    """Account a job's session and write its usage when the job shuts down"""
+    tracker = UsageTracker(ctx.job.id, agent_type).attach(session)
+
+    async def _on_shutdown():
+        tracker.write()
+
+    ctx.add_shutdown_callback(_on_shutdown)
+    return tracker
+
+
+def load_sessions() -> list[dict]:
+    path = _sessions_path()
+    if not path.exists():
+        return []
+    sessions = []
+    with path.open() as f:
+        for line in f:
+            try:
+                sessions.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return sessions
+
+
+def build_rollups(sessions: list[dict], period: int = 3600) -> list[dict]:
+    """Aggregate session records into per-period, per-agent_type buckets"""
+    buckets: dict[tuple, dict] = {}
+    for s in sessions:
+        start = int(s["started_at"] // period * period)
+        bucket = buckets.setdefault((start, s["agent_type"]), {
+            "period_start": start,
+            "agent_type": s["agent_type"],
+            "sessions": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "stt_seconds": 0.0,
+            "tts_characters": 0,
+            "tools": {},
+        })
+        bucket["sessions"] += 1
+        for key in ("prompt_tokens", "completion_tokens", "stt_seconds", "tts_characters"):
+            bucket[key] += s[key]
+        for name, stats in s["tools"].items():
+            tool = bucket["tools"].setdefault(name, {"calls": 0, "output_bytes": 0})
+            tool["calls"] += stats["calls"]
+            tool["output_bytes"] += stats["output_bytes"]
+
+    rollups = sorted(buckets.values(), key=lambda b: (b["period_start"], b["agent_type"]))
+    for bucket in rollups:
+        bucket["stt_seconds"] = round(bucket["stt_seconds"], 3)
+        bucket["cost_usd"] = round(estimate_cost(bucket), 6)
+    return rollups
+
+
+def write_rollups(period: int = 3600) -> list[dict]:
+    """Rebuild the rollups file from the sessions log"""
+    rollups = build_rollups(load_sessions(), period)
+    USAGE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = _rollups_path().with_suffix(".tmp")
+    tmp.write_text(json.dumps(rollups, indent=2) + "\n")
+    os.replace(tmp, _rollups_path())
+    return rollups
+
+
+def start_rollup_thread(interval: int = USAGE_ROLLUP_INTERVAL) -> threading.Thread:
+    """Keep the rollups file fresh while the worker runs"""
+
+    def _rollup():
+        while True:
+            time.sleep(interval)
+            try:
+                rollups = write_rollups()
+                logger.info(f"Wrote {len(rollups)} usage rollups")
+            except Exception:
+                logger.exception("Failed to write usage rollups")
+
+    thread = threading.Thread(target=_rollup, name="usage-rollups", daemon=True)
+    thread.start()
+    return thread
+
+
+def build_report(sessions: list[dict], top: int = 10) -> dict:
+    """Rank agent prompts, individual LLM calls and tools by cost"""
+    prompts: dict[str, dict] = {}
+    tools: dict[str, dict] = {}
+    calls = []
+
+    for s in sessions:
+        prompt = prompts.setdefault(s["agent_type"], {"sessions": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        prompt["sessions"] += 1
+        prompt["prompt_tokens"] += s["prompt_tokens"]
+        prompt["completion_tokens"] += s["completion_tokens"]
+        for call in s["llm_calls"]:
+            calls.append({"session_id": s["session_id"], "agent_type": s["agent_type"], **call})
+        for name, stats in s["tools"].items():
+            tool = tools.setdefault(name, {"calls": 0, "output_bytes": 0})
+            tool["calls"] += stats["calls"]
+            tool["output_bytes"] += stats["output_bytes"]
+
+    for prompt in prompts.values():
+        prompt["avg_prompt_tokens"] = round(prompt["prompt_tokens"] / prompt["sessions"])
+        prompt["cost_usd"] = round(estimate_cost(prompt), 6)
+    for tool in tools.values():
+        # Every tool output is re-read as prompt input on the next LLM call
+        tool["cost_usd"] = round(tool["output_bytes"] / BYTES_PER_TOKEN * PRICES["prompt_token"], 6)
+        tool["avg_output_bytes"] = round(tool["output_bytes"] / tool["calls"])
+    for call in calls:
+        call["cost_usd"] = round(estimate_cost(call), 6)
+
+    def _rank(items: dict) -> list[dict]:
+        return sorted(({"name": k, **v} for k, v in items.items()), key=lambda x: x["cost_usd"], reverse=True)[:top]
+
+    return {
+        "sessions": len(sessions),
+        "total_cost_usd": round(sum(s["cost_usd"] for s in sessions), 6),
+        "prompts": _rank(prompts),
+        "llm_calls": sorted(calls, key=lambda c: c["prompt_tokens"], reverse=True)[:top],
+        "tools": _rank(tools),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Usage rollups and cost report")
+    parser.add_argument("command", choices=["rollup", "report"])
+    parser.add_argument("--period", type=int, default=3600, help="Rollup bucket size in seconds")
+    parser.add_argument("--top", type=int, default=10, help="Entries per ranking")
+    args = parser.parse_args()
+
+    if args.command == "rollup":
+        rollups = write_rollups(args.period)
+        print(f"Wrote {len(rollups)} rollups to {_rollups_path()}")
+    else:
+        report = build_report(load_sessions(), args.top)
+        print(f"{report['sessions']} sessions, ${report['total_cost_usd']:.4f} total\n")
+        print("Most expensive prompts (by agent_type):")
+        for p in report["prompts"]:
+            print(f"  {p['name']:<18} ${p['cost_usd']:.4f}  {p['sessions']} sessions, avg {p['avg_prompt_tokens']} prompt tokens")
+        print("\nLargest LLM calls:")
+        for c in report["llm_calls"]:
+            print(f"  {c['agent_type']:<18} {c['prompt_tokens']:>6} prompt / {c['completion_tokens']:>5} completion  ({c['session_id']})")
+        print("\nMost expensive tools (output re-read as prompt):")
+        for t in report["tools"]:
+            print(f"  {t['name']:<24} ${t['cost_usd']:.6f}  {t['calls']} calls, avg {t['avg_output_bytes']} bytes")
@@ -10,10 +10,17 @@ from livekit.agents import (
     WorkerOptions,
     cli,
     function_tool,
-    FunctionContext,
+    RunContext,
+    StopResponse,
 )
+from livekit.agents.llm import ChatContext, ChatMessage
 from livekit.plugins import openai, deepgram, cartesia
 from config import AgentConfig, get_default_config
+from notifications import SUPPORT_ALERT_EMAIL, get_notifier
+from accounting import track_usage
+from endpointing import AdaptiveEndpointer, get_endpointing_settings
+from worker_state import DRAIN_TIMEOUT, new_record_id, register_store, track_session
+from intent_router import IntentRouter, ROUTER_ENABLED
 
 logger = logging.getLogger("customer-service-agent")
 
@@ -21,32 +28,41 @@ logger = logging.getLogger("customer-service-agent")
 KNOWLEDGE_BASE = {
     "account": {
         "question": "How do I create an account?",
-        "answer": "You can create an account by clicking the 'Sign Up' button on our homepage and filling in your details."
+        "answer": "You can create an account by clicking the 'Sign Up' button on our homepage and filling in your details.",
+        "keywords": ["sign up", "create account", "new account", "register", "open account"]
     },
     "password": {
         "question": "How do I reset my password?",
-        "answer": "Click 'Forgot Password' on the login page, enter your email, and we'll send you a reset link."
+        "answer": "Click 'Forgot Password' on the login page, enter your email, and we'll send you a reset link.",
+        "keywords": ["reset password", "forgot password", "password", "login", "locked out", "can't log in"]
     },
     "billing": {
         "question": "How does billing work?",
-        "answer": "We offer monthly and annual subscription plans. You can manage your billing from your account settings."
+        "answer": "We offer monthly and annual subscription plans. You can manage your billing from your account settings.",
+        "keywords": ["billing", "bill", "billed", "payment", "charge"]
     },
     "cancel": {
         "question": "How do I cancel my subscription?",
-        "answer": "You can cancel anytime from Account Settings > Subscription. Your access continues until the end of your billing period."
+        "answer": "You can cancel anytime from Account Settings > Subscription. Your access continues until the end of your billing period.",
+        "keywords": ["cancel", "cancel subscription", "cancellation", "stop subscription"]
     },
     "support": {
         "question": "How do I contact support?",
-        "answer": "You can reach our support team via email at support@mindcallflow.com or through live chat on our website."
+        "answer": "You can reach our support team via email at support@mindcallflow.com or through live chat on our website.",
+        "keywords": ["contact support", "support team", "support email", "talk to support", "live chat"]
     },
     "features": {
         "question": "What features does Mind Call Flow offer?",
-        "answer": "Mind Call Flow offers AI-powered voice agents, real-time transcription, scheduling tools, and customer service automation."
+        "answer": "Mind Call Flow offers AI-powered voice agents, real-time transcription, scheduling tools, and customer service automation.",
+        "keywords": ["features", "what do you offer", "what can it do", "capabilities"]
     }
 }
 
 # Support tickets storage
-support_tickets = []
+support_tickets = register_store("support_tickets", [])
+
+# Answers simple turns locally instead of a gpt-4o-mini round trip
+local_router = IntentRouter().add_small_talk().add_knowledge_base(KNOWLEDGE_BASE)
 
 
 class CustomerServiceAgent(Agent):
@@ -83,10 +99,23 @@ class CustomerServiceAgent(Agent):
             instructions="Greet the customer warmly and let them know you're here to help with any questions or issues. Ask how you can assist them today."
         )
 
+    async def on_user_turn_completed(self, turn_ctx: ChatContext, new_message: ChatMessage):
+        """Answer simple turns from canned text, skipping the LLM when confident"""
+        if not ROUTER_ENABLED:
+            return
+        answer = local_router.route(new_message.text_content or "")
+        if answer:
+            # StopResponse skips the framework's own commit of the user turn, so keep the
+            # question in the history before the canned reply is added after it
+            turn_ctx.items.append(new_message)
+            await self.update_chat_ctx(turn_ctx)
+            self.session.say(answer)
+            raise StopResponse()
+
 
 @function_tool
 async def search_knowledge_base(
-    ctx: FunctionContext,
+    ctx: RunContext,
     query: Annotated[str, "The customer's question or topic to search for"]
 ) -> str:
     """Search the knowledge base for answers to customer questions"""
@@ -108,7 +137,7 @@ async def search_knowledge_base(
 
 @function_tool
 async def create_ticket(
-    ctx: FunctionContext,
+    ctx: RunContext,
     customer_name: Annotated[str, "Customer name"],
     email: Annotated[str, "Customer email"],
     issue_description: Annotated[str, "Description of the issue"],
@@ -118,7 +147,7 @@ async def create_ticket(
     logger.info(f"Creating support ticket for {customer_name}")
 
     ticket = {
-        "id": f"TICKET-{len(support_tickets) + 1001}",
+        "id": new_record_id("TICKET"),
         "customer_name": customer_name,
         "email": email,
         "description": issue_description,
@@ -134,17 +163,20 @@ async def create_ticket(
 
 @function_tool
 async def escalate_to_human(
-    ctx: FunctionContext,
+    ctx: RunContext,
     reason: Annotated[str, "Reason for escalation"],
     customer_email: Annotated[str | None, "Customer email if available"] = None
 ) -> str:
     """Escalate the conversation to a human agent"""
     logger.info(f"Escalating to human agent. Reason: {reason}")
 
-    # In production, this would trigger a notification to support staff
+    # Alert support staff in the background so the voice turn isn't blocked on SMTP
+    notifier = get_notifier()
+    notifier.enqueue(SUPPORT_ALERT_EMAIL, "escalation", reason=reason, customer_email=customer_email or "not provided")
     message = "I've requested a human agent to assist you. A team member will join this conversation shortly."
 
     if customer_email:
+        notifier.enqueue(customer_email, "escalation_customer", reason=reason)
         message += f" We'll also send you an email at {customer_email} with next steps."
 
     return message
@@ -152,7 +184,7 @@ async def escalate_to_human(
 
 @function_tool
 async def check_service_status(
-    ctx: FunctionContext,
+    ctx: RunContext,
     service: Annotated[str, "Service to check (e.g., 'api', 'voice', 'web')"] = "all"
 ) -> str:
     """Check the status of Mind Call Flow services"""
@@ -169,6 +201,9 @@ async def entrypoint(ctx: JobContext):
     """Main entry point for the agent"""
     logger.info(f"Connecting to room: {ctx.room.name}")
     await ctx.connect()
+    track_session(ctx)
+    # Deliver queued emails before the job process exits
+    ctx.add_shutdown_callback(lambda: get_notifier().drain())
 
     # Load configuration
     config_data = ctx.job.metadata if hasattr(ctx.job, 'metadata') else {}
@@ -177,6 +212,9 @@ async def entrypoint(ctx: JobContext):
 
     logger.info(f"Starting customer service agent with config: {config.model_dump()}")
 
+    # Turn detection timing follows the configured pacing and adapts to the caller
+    endpointing = get_endpointing_settings(config)
+
     # Create agent session
     session = AgentSession(
         stt=deepgram.STT(model="nova-2"),
@@ -185,7 +223,12 @@ async def entrypoint(ctx: JobContext):
             voice=config.get_voice_id("cartesia"),
             speed="normal" if config.style.pacing == "normal" else config.style.pacing,
         ),
+        min_endpointing_delay=endpointing.min_endpointing_delay,
+        max_endpointing_delay=endpointing.max_endpointing_delay,
+        min_interruption_duration=endpointing.min_interruption_duration,
     )
+    AdaptiveEndpointer(endpointing).attach(session)
+    track_usage(ctx, session, config.agent_type)
 
     # Start the session with function tools
     agent = CustomerServiceAgent(config)
@@ -201,5 +244,6 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             agent_name="customer-service-agent",
+            drain_timeout=DRAIN_TIMEOUT,
         )
     )
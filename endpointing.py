@@ -0,0 +1,168 @@
+"""
+Endpointing module - turn detection timing derived from conversational style and adapted per caller
+"""
+import logging
+import os
+import time
+from pydantic import BaseModel
+from config import AgentConfig
+
+logger = logging.getLogger("endpointing")
+
+ADAPTIVE_ENDPOINTING = os.getenv("ADAPTIVE_ENDPOINTING", "true").lower() == "true"
+
+# LiveKit's default silence before a turn is considered finished
+LIBRARY_MIN_ENDPOINTING_DELAY = 0.5
+
+# Base silence thresholds (seconds) per ConversationalStyle.pacing
+PACING_ENDPOINTING = {
+    "slow": {"min_endpointing_delay": 0.9, "max_endpointing_delay": 6.0, "min_interruption_duration": 0.7},
+    "normal": {"min_endpointing_delay": 0.5, "max_endpointing_delay": 4.0, "min_interruption_duration": 0.5},
+    "fast": {"min_endpointing_delay": 0.3, "max_endpointing_delay": 2.5, "min_interruption_duration": 0.35},
+}
+
+# Extra patience for agents whose callers dictate details (dates, emails, problem descriptions)
+AGENT_TYPE_EXTRA_DELAY = {
+    "general": 0.0,
+    "scheduling": 0.15,
+    "customer_service": 0.15,
+    "outbound": 0.1,
+}
+
+# Empathetic calls should never cut a hesitant caller off
+EMPATHETIC_EXTRA_DELAY = 0.2
+
+# Gaps longer than this are treated as a finished turn rather than a mid-turn pause
+MAX_INTRA_TURN_PAUSE = 3.0
+PAUSE_WINDOW = 20
+PAUSE_MARGIN = 0.1
+
+
+class EndpointingSettings(BaseModel):
+    """Turn detection settings for a single session"""
+    min_endpointing_delay: float
+    max_endpointing_delay: float
+    min_interruption_duration: float
+    floor: float
+    ceiling: float
+
+
+def get_endpointing_settings(config: AgentConfig) -> EndpointingSettings:
+    """Derive silence thresholds and min-speech duration from the style and agent type"""
+    base = PACING_ENDPOINTING[config.style.pacing]
+    delay = base["min_endpointing_delay"] + AGENT_TYPE_EXTRA_DELAY.get(config.agent_type, 0.0)
+    if config.style.tone == "empathetic":
+        delay += EMPATHETIC_EXTRA_DELAY
+
+    return EndpointingSettings(
+        min_endpointing_delay=round(delay, 3),
+        max_endpointing_delay=base["max_endpointing_delay"],
+        min_interruption_duration=base["min_interruption_duration"],
+        # Online adaptation may move the delay within these bounds
+        floor=round(max(delay * 0.5, 0.2), 3),
+        ceiling=round(min(delay * 2.0, base["max_endpointing_delay"]), 3),
+    )
+
+
+class AdaptiveEndpointer:
+    """Tunes the endpointing delay online from a caller's measured pause distribution"""
+
+    def __init__(self, settings: EndpointingSettings):
+        self.settings = settings
+        self.delay = settings.min_endpointing_delay
+        self.pauses: list[float] = []
+        self.turns = 0
+        self._session = None
+        self._user_stopped_at: float | None = None
+        self._turn_delay: float | None = None
+        self._agent_replied = False
+        self._agent_speaking = False
+
+    def observe_pause(self, seconds: float) -> float:
+        """Record a mid-turn pause and return the updated endpointing delay"""
+        if 0 < seconds <= MAX_INTRA_TURN_PAUSE:
+            self.pauses.append(seconds)
+            del self.pauses[:-PAUSE_WINDOW]
+        return self._recompute()
+
+    def observe_cutoff(self) -> float:
+        """The caller kept talking after we started replying - be more patient"""
+        self.delay = min(self.delay + PAUSE_MARGIN, self.settings.ceiling)
+        return self.delay
+
+    def _recompute(self) -> float:
+        if len(self.pauses) < 3:
+            return self.delay
+        # Wait just past the caller's typical long pause (~90th percentile)
+        ordered = sorted(self.pauses)
+        p90 = ordered[min(int(len(ordered) * 0.9), len(ordered) - 1)]
+        target = min(max(p90 + PAUSE_MARGIN, self.settings.floor), self.settings.ceiling)
+        # Move gradually so one outlier doesn't swing the next turn
+        self.delay = round(0.7 * self.delay + 0.3 * target, 3)
+        return self.delay
+
+    def attach(self, session) -> "AdaptiveEndpointer":
+        """Listen to session state changes and apply the adapted delay"""
+        if not ADAPTIVE_ENDPOINTING:
+            return self
+        self._session = session
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        return self
+
+    def _on_agent_state_changed(self, ev) -> None:
+        self._agent_speaking = ev.new_state == "speaking"
+        if self._agent_speaking and self._user_stopped_at is not None and not self._agent_replied:
+            self._agent_replied = True
+            self._log_turn(time.monotonic() - self._user_stopped_at)
+
+    def _on_user_state_changed(self, ev) -> None:
+        now = time.monotonic()
+        if ev.new_state == "listening" and ev.old_state == "speaking":
+            self._user_stopped_at = now
+            self._turn_delay = self._live_delay()
+            self._agent_replied = False
+            return
+
+        if ev.new_state != "speaking" or self._user_stopped_at is None:
+            return
+
+        gap = now - self._user_stopped_at
+        self._user_stopped_at = None
+        if not self._agent_replied:
+            self.observe_pause(gap)
+        elif self._agent_speaking and gap <= MAX_INTRA_TURN_PAUSE:
+            self.observe_cutoff()
+        else:
+            return
+        self._apply()
+
+    def _audio_recognition(self):
+        # livekit-agents 1.1 copies the delay into the activity's AudioRecognition when the
+        # activity starts and has no runtime setter, so the running instance is updated directly
+        activity = getattr(self._session, "_activity", None)
+        recognition = getattr(activity, "_audio_recognition", None)
+        return recognition if hasattr(recognition, "_min_endpointing_delay") else None
+
+    def _live_delay(self) -> float:
+        """The endpointing delay the running session actually waits for"""
+        recognition = self._audio_recognition()
+        if recognition is not None:
+            return recognition._min_endpointing_delay
+        return self._session.options.min_endpointing_delay
+
+    def _apply(self) -> None:
+        self._session.options.min_endpointing_delay = self.delay
+        recognition = self._audio_recognition()
+        if recognition is not None:
+            recognition._min_endpointing_delay = self.delay
+
+    def _log_turn(self, response_latency: float) -> None:
+        self.turns += 1
+        delay = self._turn_delay if self._turn_delay is not None else self._live_delay()
+        gained_ms = (LIBRARY_MIN_ENDPOINTING_DELAY - delay) * 1000
+        logger.info(
+            f"Turn {self.turns}: response {response_latency * 1000:.0f}ms after end of speech, "
+            f"endpointing delay {delay * 1000:.0f}ms ({gained_ms:+.0f}ms vs library default, "
+            f"{len(self.pauses)} pauses observed)"
+        )
@@ -11,6 +11,9 @@ from livekit.agents import (
 )
 from livekit.plugins import openai, deepgram, cartesia
 from config import AgentConfig, get_default_config
+from accounting import track_usage
+from endpointing import AdaptiveEndpointer, get_endpointing_settings
+from worker_state import track_session
 
 logger = logging.getLogger("general-assistant")
 
@@ -54,6 +57,7 @@ async def entrypoint(ctx: JobContext):
     """Main entry point for the agent"""
     logger.info(f"Connecting to room: {ctx.room.name}")
     await ctx.connect()
+    track_session(ctx)
 
     # Load configuration from job metadata if provided, otherwise use defaults
     config_data = ctx.job.metadata if hasattr(ctx.job, 'metadata') else {}
@@ -61,6 +65,9 @@ async def entrypoint(ctx: JobContext):
 
     logger.info(f"Starting agent with config: {config.model_dump()}")
 
+    # Turn detection timing follows the configured pacing and adapts to the caller
+    endpointing = get_endpointing_settings(config)
+
     # Create agent session with configured STT/LLM/TTS
     session = AgentSession(
         stt=deepgram.STT(model="nova-2"),
@@ -69,7 +76,12 @@ async def entrypoint(ctx: JobContext):
             voice=config.get_voice_id("cartesia"),
             speed="normal" if config.style.pacing == "normal" else config.style.pacing,
         ),
+        min_endpointing_delay=endpointing.min_endpointing_delay,
+        max_endpointing_delay=endpointing.max_endpointing_delay,
+        min_interruption_duration=endpointing.min_interruption_duration,
     )
+    AdaptiveEndpointer(endpointing).attach(session)
+    track_usage(ctx, session, config.agent_type)
 
     # Start the session
     agent = GeneralAssistant(config)
@@ -0,0 +1,328 @@
+"""
+Local intent router - answers simple turns without an LLM round trip
+"""
+import argparse
+import logging
+import math
+import os
+import re
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger("intent-router")
+
+# Minimum confidence required to answer locally; anything below goes to the LLM
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.75"))
+ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+
+# Longer turns usually carry more than one request - leave those to the LLM
+MAX_ROUTED_WORDS = 14
+
+# A single keyword hit ("stop", "cancel that") is too little evidence to answer locally
+MIN_MATCHED_WORDS = 2
+
+# Negated turns ("I don't want to reset my password") always go to the LLM
+NEGATIONS = {"no", "not", "dont", "doesnt", "didnt", "cant", "never", "nope", "without"}
+
+STOPWORDS = {
+    "a", "about", "an", "and", "any", "are", "can", "could", "do", "does", "for",
+    "get", "i", "im", "is", "it", "know", "like", "me", "my", "of", "on", "please",
+    "so", "tell", "that", "the", "there", "to", "want", "was", "what", "whats",
+    "with", "would", "you", "your", "how", "need", "just", "um", "uh", "okay", "ok",
+}
+
+# Conversational turns that never need the LLM
+SMALL_TALK = {
+    "greeting": {
+        "patterns": [
+            r"(hi|hello|hey)( there)?",
+            r"good (morning|afternoon|evening)",
+        ],
+        "answer": "Hi there! How can I help you today?",
+    },
+    "thanks": {
+        "patterns": [
+            r"(thanks|thank you)( (so|very) much)?( for your help)?",
+            r"(great|perfect|awesome),? thanks",
+        ],
+        "answer": "You're very welcome! Is there anything else I can help you with?",
+    },
+    "goodbye": {
+        "patterns": [
+            r"(bye|goodbye|bye bye)",
+            r"(that's all|that is all|nothing else),? (thanks|thank you)",
+        ],
+        "answer": "Thanks for calling Mind Call Flow. Have a great day!",
+    },
+}
+
+# Labelled utterances per agent for the offline evaluation harness (None = should go to the LLM)
+EVAL_SAMPLES = {
+    "customer_service": [
+        ("hello", "greeting"),
+        ("hey there", "greeting"),
+        ("good morning", "greeting"),
+        ("thanks so much", "thanks"),
+        ("thank you", "thanks"),
+        ("bye", "goodbye"),
+        ("that's all, thanks", "goodbye"),
+        ("how do I reset my password", "kb:password"),
+        ("I forgot my password", "kb:password"),
+        ("where do I change my password", "kb:password"),
+        ("how do I create an account", "kb:account"),
+        ("I want to sign up", "kb:account"),
+        ("how does billing work", "kb:billing"),
+        ("can I pay for the year instead of monthly", "kb:billing"),
+        ("how do I cancel my subscription", "kb:cancel"),
+        ("how can I contact support", "kb:support"),
+        ("what features do you offer", "kb:features"),
+        ("my invoice from last month charged me twice and I need a refund", None),
+        ("I forgot my password and my billing address is wrong too", None),
+        ("can you explain why my calls keep dropping", None),
+        ("how much does it cost", None),
+        ("do you integrate with salesforce", None),
+        ("what's the weather like", None),
+        ("yes", None),
+        ("I'd like to talk about something else entirely", None),
+        ("stop", None),
+        ("cancel that", None),
+        ("I want to cancel", None),
+        ("password", None),
+        ("no I dont want to reset my password", None),
+        ("I don't want to cancel my subscription", None),
+        ("not the billing question, something else", None),
+    ],
+    "outbound": [
+        ("how much does it cost", "product:pricing"),
+        ("what are your pricing plans", "product:pricing"),
+        ("what are the monthly prices", "product:pricing"),
+        ("what features do you offer", "product:features"),
+        ("what can it do", "product:features"),
+        ("do you integrate with salesforce", "product:integration"),
+        ("does it work with hubspot", "product:integration"),
+        ("is my data secure", "product:security"),
+        ("are you HIPAA compliant", "product:security"),
+        ("hello", None),
+        ("yes", None),
+        ("thank you", None),
+        ("bye", None),
+        ("no thanks I'm busy right now", None),
+        ("sure, I have a few minutes", None),
+        ("can you call me back tomorrow", None),
+        ("send me an email with the details", None),
+        ("how did you get my number", None),
+        ("wait, never mind the pricing", None),
+        ("I don't care about security", None),
+        ("we already use salesforce and it's fine", None),
+        ("stop", None),
+    ],
+}
+
+# Module exposing each evaluated agent's production local_router
+AGENT_ROUTERS = {
+    "customer_service": "customer_service",
+    "outbound": "outbound_caller",
+}
+
+
+@dataclass
+class RouteResult:
+    """Outcome of classifying a single user turn"""
+    intent: str | None
+    confidence: float
+    answer: str | None = None
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9$' ]", " ", text.lower())).strip()
+
+
+def _tokenize(text: str) -> list[str]:
+    tokens = []
+    for word in _normalize(text).replace("'", "").split():
+        if word in STOPWORDS:
+            continue
+        # Cheap plural folding so "prices" matches "price"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def _features(tokens: list[str]) -> set[str]:
+    """Unigrams plus bigrams of the content words"""
+    return set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+class IntentRouter:
+    """Keyword/regex plus n-gram classifier built from the agents' tool data"""
+
+    def __init__(self, threshold: float = ROUTER_CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self._answers: dict[str, str] = {}
+        self._profiles: dict[str, set[str]] = {}
+        self._patterns: list[tuple[re.Pattern, str]] = []
+        self._idf: dict[str, float] = {}
+        self._unknown_weight = 0.0
+
+    def add_intent(
+        self,
+        name: str,
+        answer: str,
+        examples: list[str] | tuple[str, ...] = (),
+        patterns: list[str] | tuple[str, ...] = (),
+    ) -> None:
+        """Register an intent with its canned answer, example phrasings and regexes"""
+        if name in self._answers:
+            raise ValueError(f"Intent '{name}' is already registered")
+        self._answers[name] = answer
+        profile = self._profiles.setdefault(name, set())
+        for example in examples:
+            profile |= _features(_tokenize(example))
+        for pattern in patterns:
+            self._patterns.append((re.compile(rf"^{pattern}[.!]*$"), name))
+        self._rebuild_idf()
+
+    def add_small_talk(self) -> "IntentRouter":
+        """Register greeting, thanks and goodbye intents"""
+        for name, item in SMALL_TALK.items():
+            self.add_intent(name, item["answer"], patterns=item["patterns"])
+        return self
+
+    def add_knowledge_base(self, knowledge_base: dict) -> "IntentRouter":
+        """Register one intent per KNOWLEDGE_BASE entry as kb:<key>"""
+        for key, item in knowledge_base.items():
+            examples = [key, item["question"], *item.get("keywords", [])]
+            self.add_intent(f"kb:{key}", item["answer"], examples=examples)
+        return self
+
+    def add_product_answers(self, answers: dict, keywords: dict) -> "IntentRouter":
+        """Register answer_product_question topics as product:<topic> (the catch-all "other" is skipped)"""
+        for topic, answer in answers.items():
+            if topic in keywords:
+                self.add_intent(f"product:{topic}", answer, examples=[topic, *keywords[topic]])
+        return self
+
+    def _rebuild_idf(self) -> None:
+        doc_freq: dict[str, int] = {}
+        for profile in self._profiles.values():
+            for feature in profile:
+                doc_freq[feature] = doc_freq.get(feature, 0) + 1
+        total = max(len(self._profiles), 1)
+        self._idf = {f: math.log(1 + total / df) for f, df in doc_freq.items()}
+        self._unknown_weight = math.log(1 + total)
+
+    def classify(self, text: str) -> RouteResult:
+        """Classify a user turn; never raises on odd input"""
+        normalized = _normalize(text)
+        if not normalized:
+            return RouteResult(None, 0.0)
+
+        for pattern, name in self._patterns:
+            if pattern.match(normalized):
+                return RouteResult(name, 1.0, self._answers[name])
+
+        if len(normalized.split()) > MAX_ROUTED_WORDS:
+            return RouteResult(None, 0.0)
+
+        if NEGATIONS & set(normalized.replace("'", "").split()):
+            return RouteResult(None, 0.0)
+
+        tokens = _tokenize(normalized)
+        if not tokens:
+            return RouteResult(None, 0.0)
+        words = set(tokens)
+        query = _features(tokens)
+
+        # Words the router has never seen count against every intent; matching
+        # bigrams only add evidence so unseen word pairs are not penalised twice
+        total_weight = sum(self._idf.get(w, self._unknown_weight) for w in words)
+        scores = []
+        for name, profile in self._profiles.items():
+            if not profile:
+                continue
+            hits = query & profile
+            # Require a bigram hit or several matched words, never a lone keyword
+            if len(hits & words) < MIN_MATCHED_WORDS and not hits - words:
+                continue
+            matched = sum(self._idf[f] for f in hits)
+            scores.append((min(matched / total_weight, 1.0), name))
+
+        if not scores:
+            return RouteResult(None, 0.0)
+
+        scores.sort(reverse=True)
+        best_score, best_name = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        # Penalise ambiguous turns that hit several intents
+        confidence = max(best_score - 0.5 * runner_up, 0.0)
+        return RouteResult(best_name, confidence, self._answers[best_name])
+
+    def route(self, text: str) -> str | None:
+        """Return the canned answer if confident enough, otherwise None (use the LLM)"""
+        result = self.classify(text)
+        if result.intent and result.confidence >= self.threshold:
+            logger.info(f"Routed locally to '{result.intent}' (confidence {result.confidence:.2f})")
+            return result.answer
+        return None
+
+
+def evaluate(router: IntentRouter, samples: list[tuple[str, str | None]]) -> dict:
+    """Offline precision/coverage/latency report for a router"""
+    answered = correct = should_answer = 0
+    latencies_ms = []
+    misses = []
+
+    for text, expected in samples:
+        start = time.perf_counter()
+        result = router.classify(text)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        routed = result.intent if result.confidence >= router.threshold else None
+        if expected is not None:
+            should_answer += 1
+        if routed is not None:
+            answered += 1
+            if routed == expected:
+                correct += 1
+        if routed != expected:
+            misses.append((text, expected, result.intent, round(result.confidence, 2)))
+
+    latencies_ms.sort()
+    return {
+        "samples": len(samples),
+        "answered_locally": answered,
+        "coverage": answered / len(samples) if samples else 0.0,
+        "precision": correct / answered if answered else 1.0,
+        "recall": correct / should_answer if should_answer else 1.0,
+        "latency_p50_ms": latencies_ms[len(latencies_ms) // 2] if latencies_ms else 0.0,
+        "latency_p95_ms": latencies_ms[int(len(latencies_ms) * 0.95)] if latencies_ms else 0.0,
+        "latency_max_ms": latencies_ms[-1] if latencies_ms else 0.0,
+        "misses": misses,
+    }
+
+
+def load_agent_router(agent_type: str, threshold: float | None = None) -> IntentRouter:
+    """The local_router an agent uses in production, optionally at another threshold"""
+    import importlib
+
+    router = importlib.import_module(AGENT_ROUTERS[agent_type]).local_router
+    if threshold is not None:
+        router.threshold = threshold
+    return router
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the agents' local intent routers offline")
+    parser.add_argument("--agent", choices=sorted(AGENT_ROUTERS), action="append",
+                        help="Agent to evaluate (repeatable, default: all)")
+    parser.add_argument("--threshold", type=float, default=ROUTER_CONFIDENCE_THRESHOLD)
+    args = parser.parse_args()
+
+    for agent_type in args.agent or sorted(AGENT_ROUTERS):
+        print(f"== {agent_type}")
+        report = evaluate(load_agent_router(agent_type, args.threshold), EVAL_SAMPLES[agent_type])
+        for text, expected, got, confidence in report.pop("misses"):
+            print(f"MISS  {text!r}: expected={expected} got={got} confidence={confidence}")
+        for key, value in report.items():
+            print(f"{key:>18}: {value:.3f}" if isinstance(value, float) else f"{key:>18}: {value}")
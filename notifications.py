@@ -0,0 +1,370 @@
+"""
+Notifications module - queued, rate-limited email delivery that never blocks a voice turn
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import smtplib
+import time
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from functools import lru_cache
+from string import Template
+
+logger = logging.getLogger("notifications")
+
+SMTP_HOST = os.getenv("SMTP_HOST")  # Unset: notifications are only logged (demo mode)
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+NOTIFY_FROM = os.getenv("NOTIFY_FROM", "Mind Call Flow <no-reply@mindcallflow.com>")
+SUPPORT_ALERT_EMAIL = os.getenv("SUPPORT_ALERT_EMAIL", "support@mindcallflow.com")
+
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "4"))  # Pooled SMTP connections
+NOTIFY_RATE_PER_MINUTE = int(os.getenv("NOTIFY_RATE_PER_MINUTE", "6000"))
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+NOTIFY_DEDUP_WINDOW = int(os.getenv("NOTIFY_DEDUP_WINDOW", "600"))
+RETRY_BASE_DELAY = 1.0
+
+# Email templates, keyed by notification kind ("info" is rendered once per info_type)
+TEMPLATES = {
+    "confirmation": {
+        "subject": "Your Mind Call Flow appointment is confirmed",
+        "body": "Hello,\n\nYour appointment is confirmed.\n\n$details\n\nSee you then!\nMind Call Flow",
+    },
+    "info": {
+        "subject": "Mind Call Flow: $title",
+        "body": "Hello,\n\nThanks for speaking with us. Here is the $title you asked for:\n\n$content\n\nMind Call Flow",
+    },
+    "escalation": {
+        "subject": "Escalation requested by a caller",
+        "body": "A caller asked for a human agent.\n\nReason: $reason\nCustomer email: $customer_email",
+    },
+    "escalation_customer": {
+        "subject": "A Mind Call Flow team member will follow up",
+        "body": "Hello,\n\nWe've asked a member of our team to help with: $reason\n\nThey will be in touch shortly.\nMind Call Flow",
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def get_template(kind: str, info_type: str | None = None) -> tuple[Template, Template]:
+    """Compiled (subject, body) templates, cached per kind and info_type"""
+    template = TEMPLATES[kind]
+    subject, body = template["subject"], template["body"]
+    if info_type:
+        title = info_type.replace("_", " ")
+        subject = Template(subject).safe_substitute(title=title)
+        body = Template(body).safe_substitute(title=title)
+    return Template(subject), Template(body)
+
+
+@dataclass
+class Notification:
+    """A single email waiting to be delivered"""
+    to: str
+    subject: str
+    body: str
+    attempts: int = 0
+    key: str = field(init=False)
+
+    def __post_init__(self):
+        self.key = hashlib.sha1(f"{self.to.lower()}\0{self.subject}\0{self.body}".encode()).hexdigest()
+
+    def to_message(self) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = NOTIFY_FROM
+        message["To"] = self.to
+        message["Subject"] = self.subject
+        message.set_content(self.body)
+        return message
+
+
+class SMTPTransport:
+    """One persistent SMTP connection, reopened on failure"""
+
+    def __init__(self, host: str, port: int, use_tls: bool = SMTP_USE_TLS):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self._smtp: smtplib.SMTP | None = None
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=10)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if SMTP_USERNAME:
+                smtp.login(SMTP_USERNAME, SMTP_PASSWORD or "")
+        except BaseException:
+            # Never keep a connection that failed STARTTLS or login - a retry would send in plaintext
+            smtp.close()
+            raise
+        return smtp
+
+    def send(self, notification: Notification) -> None:
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(notification.to_message())
+        except (smtplib.SMTPException, OSError):
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+class LoggingTransport:
+    """Stand-in used when no SMTP server is configured"""
+
+    def send(self, notification: Notification) -> None:
+        logger.info(f"[demo] Would email {notification.to}: {notification.subject}")
+
+    def close(self) -> None:
+        pass
+
+
+class RateLimiter:
+    """Token bucket shared by all delivery workers"""
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0
+        self.capacity = max(self.rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Notifier:
+    """Queues notifications and delivers them in the background with retry and dedup"""
+
+    def __init__(
+        self,
+        transport_factory=None,
+        workers: int = NOTIFY_WORKERS,
+        rate_per_minute: int = NOTIFY_RATE_PER_MINUTE,
+        max_retries: int = NOTIFY_MAX_RETRIES,
+        dedup_window: int = NOTIFY_DEDUP_WINDOW,
+    ):
+        if transport_factory is None:
+            transport_factory = (lambda: SMTPTransport(SMTP_HOST, SMTP_PORT)) if SMTP_HOST else LoggingTransport
+        self.transport_factory = transport_factory
+        self.workers = workers
+        self.max_retries = max_retries
+        self.dedup_window = dedup_window
+        self.limiter = RateLimiter(rate_per_minute)
+        self.sent = 0
+        self.failed = 0
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._recent: dict[str, float] = {}  # Delivered recently (key -> delivery time)
+        self._pending: set[str] = set()  # Queued or being delivered
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def enqueue(self, to: str, kind: str, info_type: str | None = None, **fields) -> bool:
+        """Render and queue an email; returns False if an identical one is queued or was recently delivered"""
+        subject, body = get_template(kind, info_type)
+        notification = Notification(to, subject.safe_substitute(fields), body.safe_substitute(fields))
+
+        last = self._recent.get(notification.key)
+        if notification.key in self._pending or (
+            last is not None and time.monotonic() - last < self.dedup_window
+        ):
+            logger.info(f"Skipping duplicate {kind} notification to {to}")
+            return False
+        self._pending.add(notification.key)
+
+        self._ensure_started()
+        self._queue.put_nowait(notification)
+        return True
+
+    async def _worker(self) -> None:
+        transport = self.transport_factory()
+        try:
+            while True:
+                notification = await self._queue.get()
+                try:
+                    await self._deliver(transport, notification)
+                finally:
+                    self._queue.task_done()
+        finally:
+            await asyncio.to_thread(transport.close)
+
+    def _mark_delivered(self, key: str) -> None:
+        now = time.monotonic()
+        self._recent[key] = now
+        if len(self._recent) > 10_000:
+            self._recent = {k: t for k, t in self._recent.items() if now - t < self.dedup_window}
+
+    async def _deliver(self, transport, notification: Notification) -> None:
+        try:
+            await self._send_with_retry(transport, notification)
+        finally:
+            self._pending.discard(notification.key)
+
+    async def _send_with_retry(self, transport, notification: Notification) -> None:
+        while True:
+            await self.limiter.acquire()
+            try:
+                await asyncio.to_thread(transport.send, notification)
+                self.sent += 1
+                # Only a delivered email suppresses resends; a failed one can be requested again
+                self._mark_delivered(notification.key)
+                return
+            except Exception as e:
+                notification.attempts += 1
+                if notification.attempts > self.max_retries:
+                    self.failed += 1
+                    logger.error(f"Giving up on email to {notification.to}: {e}")
+                    return
+                delay = RETRY_BASE_DELAY * 2 ** (notification.attempts - 1)
+                logger.warning(f"Email to {notification.to} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        """Wait for queued notifications to be delivered, then stop the workers"""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self._queue.qsize()} notifications still queued at shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+_notifier: Notifier | None = None
+
+
+def get_notifier() -> Notifier:
+    """Process-wide notifier shared by all function tools"""
+    global _notifier
+    if _notifier is None:
+        _notifier = Notifier()
+    return _notifier
+
+
+class _SinkProtocol(asyncio.Protocol):
+    """Minimal SMTP server that accepts and discards every message"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.buffer = b""
+        self.in_data = False
+        self.data: list[bytes] = []
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.write(b"220 localhost SMTP sink\r\n")
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\r\n", 1)
+            if self.in_data:
+                if line == b".":
+                    self.in_data = False
+                    self.sink.messages.append(b"\r\n".join(self.data))
+                    self.data = []
+                    self.transport.write(b"250 OK\r\n")
+                else:
+                    self.data.append(line)
+                continue
+            command = line[:4].upper()
+            if command == b"DATA":
+                self.in_data = True
+                self.transport.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+            elif command == b"QUIT":
+                self.transport.write(b"221 Bye\r\n")
+                self.transport.close()
+            else:
+                self.transport.write(b"250 OK\r\n")
+
+
+class SMTPSink:
+    """Local SMTP stand-in for benchmarks and manual testing"""
+
+    def __init__(self):
+        self.messages: list[bytes] = []
+        self.server = None
+
+    @property
+    def received(self) -> int:
+        return len(self.messages)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        loop = asyncio.get_running_loop()
+        self.server = await loop.create_server(lambda: _SinkProtocol(self), host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def benchmark(count: int, workers: int, rate_per_minute: int) -> dict:
+    """Queue `count` notifications against a local SMTP sink and measure throughput"""
+    sink = SMTPSink()
+    port = await sink.start()
+    notifier = Notifier(
+        transport_factory=lambda: SMTPTransport("127.0.0.1", port, use_tls=False),
+        workers=workers,
+        rate_per_minute=rate_per_minute,
+    )
+
+    enqueue_us = []
+    start = time.perf_counter()
+    for i in range(count):
+        t = time.perf_counter()
+        notifier.enqueue(f"user{i}@example.com", "info", info_type="pricing", content="Plans start at $99/month.")
+        enqueue_us.append((time.perf_counter() - t) * 1_000_000)
+    await notifier.drain(timeout=max(count / rate_per_minute * 60 * 2, 30))
+    elapsed = time.perf_counter() - start
+    await sink.stop()
+
+    enqueue_us.sort()
+    return {
+        "queued": count,
+        "delivered": sink.received,
+        "failed": notifier.failed,
+        "seconds": round(elapsed, 2),
+        "per_minute": round(sink.received / elapsed * 60),
+        "enqueue_p50_us": round(enqueue_us[len(enqueue_us) // 2], 1),
+        "enqueue_p99_us": round(enqueue_us[int(len(enqueue_us) * 0.99)], 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the notification queue against a local SMTP sink")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=NOTIFY_WORKERS)
+    parser.add_argument("--rate", type=int, default=NOTIFY_RATE_PER_MINUTE, help="Rate limit per minute")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    for key, value in asyncio.run(benchmark(args.count, args.workers, args.rate)).items():
+        print(f"{key:>15}: {value}")
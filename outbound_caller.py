@@ -2,6 +2,7 @@
 Outbound Caller Agent - Initiates phone calls and demos capabilities
 """
 import logging
+import os
 from typing import Annotated
 from livekit.agents import (
     Agent,
@@ -10,15 +11,58 @@ from livekit.agents import (
     WorkerOptions,
     cli,
     function_tool,
-    FunctionContext,
+    RunContext,
+    StopResponse,
 )
+from livekit.agents.llm import ChatContext, ChatMessage
 from livekit.plugins import openai, deepgram, cartesia
 from config import AgentConfig, get_default_config
+from notifications import get_notifier
+from accounting import track_usage
+from endpointing import AdaptiveEndpointer, get_endpointing_settings
+from worker_state import DRAIN_TIMEOUT, register_store, track_session
+from intent_router import IntentRouter, ROUTER_ENABLED
 
 logger = logging.getLogger("outbound-caller-agent")
 
 # Call outcomes storage
-call_outcomes = []
+call_outcomes = register_store("call_outcomes", [])
+
+# Canned product answers used by answer_product_question and the local intent router
+PRODUCT_ANSWERS = {
+    "pricing": "Mind Call Flow offers flexible pricing starting at $99/month for the Starter plan, $299/month for Professional, and custom Enterprise pricing. All plans include unlimited voice minutes and real-time transcription.",
+
+    "features": "Key features include: AI-powered voice agents with customizable personalities, real-time conversation transcription, multi-agent support (scheduling, customer service, general assistant), integration with calendars and CRMs, and detailed analytics.",
+
+    "integration": "We integrate with popular tools including Google Calendar, Salesforce, HubSpot, Slack, and have a REST API for custom integrations. We also support webhooks for real-time event notifications.",
+
+    "security": "Mind Call Flow is SOC 2 compliant with end-to-end encryption for all conversations. We're GDPR and HIPAA compliant, with data residency options available for Enterprise customers.",
+
+    "other": "Mind Call Flow is a next-generation voice AI platform that helps businesses automate customer interactions while maintaining a human touch. Perfect for customer service, scheduling, and outbound campaigns."
+}
+
+# Where callers book a full product demo
+DEMO_BOOKING_URL = os.getenv("DEMO_BOOKING_URL", "https://mind-call-flow.vercel.app")
+
+# Email content for every info_type send_info_email offers
+INFO_EMAIL_CONTENT = {
+    "pricing": PRODUCT_ANSWERS["pricing"],
+    "features": PRODUCT_ANSWERS["features"],
+    "case_study": "Teams use Mind Call Flow to answer support calls around the clock, book appointments without hold times, and run outbound demo campaigns. Reply to this email and we'll share the customer stories closest to your use case.",
+    "demo_link": f"Book a full product demo at a time that suits you: {DEMO_BOOKING_URL}",
+}
+
+# Phrasings that map a caller's question to a PRODUCT_ANSWERS topic
+PRODUCT_KEYWORDS = {
+    "pricing": ["price", "pricing", "cost", "how much", "plans", "expensive", "per month", "monthly price", "pricing plans"],
+    "features": ["features", "what does it do", "capabilities", "what can it do", "features you offer", "main features"],
+    "integration": ["integrate", "integration", "salesforce", "hubspot", "google calendar", "slack", "api", "webhooks", "crm",
+                    "works with salesforce", "works with hubspot", "works with slack"],
+    "security": ["secure", "security", "data secure", "encryption", "soc 2", "gdpr", "hipaa", "hipaa compliant", "compliant"],
+}
+
+# Answers simple turns locally instead of a gpt-4o-mini round trip
+local_router = IntentRouter().add_product_answers(PRODUCT_ANSWERS, PRODUCT_KEYWORDS)
 
 
 class OutboundCallerAgent(Agent):
@@ -61,10 +105,23 @@ class OutboundCallerAgent(Agent):
             instructions=f"Greet {self.user_name} warmly by name, introduce yourself as an AI assistant from Mind Call Flow, and explain this is a demo call. Ask if they have a moment to see our voice AI capabilities."
         )
 
+    async def on_user_turn_completed(self, turn_ctx: ChatContext, new_message: ChatMessage):
+        """Answer simple turns from canned text, skipping the LLM when confident"""
+        if not ROUTER_ENABLED:
+            return
+        answer = local_router.route(new_message.text_content or "")
+        if answer:
+            # StopResponse skips the framework's own commit of the user turn, so keep the
+            # question in the history before the canned reply is added after it
+            turn_ctx.items.append(new_message)
+            await self.update_chat_ctx(turn_ctx)
+            self.session.say(answer)
+            raise StopResponse()
+
 
 @function_tool
 async def log_call_outcome(
-    ctx: FunctionContext,
+    ctx: RunContext,
     outcome: Annotated[str, "Call outcome: answered, interested, not_interested, callback, or voicemail"],
     notes: Annotated[str | None, "Additional notes about the call"] = None
 ) -> str:
@@ -84,7 +141,7 @@ async def log_call_outcome(
 
 @function_tool
 async def schedule_followup(
-    ctx: FunctionContext,
+    ctx: RunContext,
     contact_name: Annotated[str, "Name of the contact"],
     preferred_date: Annotated[str, "Preferred date for follow-up"],
     preferred_time: Annotated[str, "Preferred time for follow-up"],
@@ -98,7 +155,7 @@ async def schedule_followup(
 
 @function_tool
 async def send_info_email(
-    ctx: FunctionContext,
+    ctx: RunContext,
     email: Annotated[str, "Email address"],
     info_type: Annotated[str, "Type of information to send: pricing, features, case_study, or demo_link"]
 ) -> str:
@@ -112,38 +169,35 @@ async def send_info_email(
         "demo_link": "link to schedule a full product demo"
     }
 
-    description = info_descriptions.get(info_type, "information")
+    if info_type not in INFO_EMAIL_CONTENT:
+        return f"I can't send {info_type} information. I can email pricing, features, case_study, or demo_link information."
+
+    description = info_descriptions[info_type]
+
+    # Queued for background delivery so the voice turn isn't blocked on SMTP
+    get_notifier().enqueue(email, "info", info_type=info_type, content=INFO_EMAIL_CONTENT[info_type])
 
     return f"I've sent {description} to {email}. Please check your inbox in the next few minutes."
 
 
 @function_tool
 async def answer_product_question(
-    ctx: FunctionContext,
+    ctx: RunContext,
     question_topic: Annotated[str, "Topic of the question: pricing, features, integration, security, or other"]
 ) -> str:
     """Get detailed information to answer product questions"""
     logger.info(f"Answering product question about: {question_topic}")
 
-    answers = {
-        "pricing": "Mind Call Flow offers flexible pricing starting at $99/month for the Starter plan, $299/month for Professional, and custom Enterprise pricing. All plans include unlimited voice minutes and real-time transcription.",
-
-        "features": "Key features include: AI-powered voice agents with customizable personalities, real-time conversation transcription, multi-agent support (scheduling, customer service, general assistant), integration with calendars and CRMs, and detailed analytics.",
-
-        "integration": "We integrate with popular tools including Google Calendar, Salesforce, HubSpot, Slack, and have a REST API for custom integrations. We also support webhooks for real-time event notifications.",
-
-        "security": "Mind Call Flow is SOC 2 compliant with end-to-end encryption for all conversations. We're GDPR and HIPAA compliant, with data residency options available for Enterprise customers.",
-
-        "other": "Mind Call Flow is a next-generation voice AI platform that helps businesses automate customer interactions while maintaining a human touch. Perfect for customer service, scheduling, and outbound campaigns."
-    }
-
-    return answers.get(question_topic, answers["other"])
+    return PRODUCT_ANSWERS.get(question_topic, PRODUCT_ANSWERS["other"])
 
 
 async def entrypoint(ctx: JobContext):
     """Main entry point for the agent"""
     logger.info(f"Connecting to room: {ctx.room.name}")
     await ctx.connect()
+    track_session(ctx)
+    # Deliver queued emails before the job process exits
+    ctx.add_shutdown_callback(lambda: get_notifier().drain())
 
     # Load configuration - outbound calls should have user info in metadata
     config_data = ctx.job.metadata if hasattr(ctx.job, 'metadata') else {}
@@ -153,6 +207,9 @@ async def entrypoint(ctx: JobContext):
     # Log outbound call details
     logger.info(f"Starting outbound call to {config.user_name} ({config.user_phone})")
 
+    # Turn detection timing follows the configured pacing and adapts to the caller
+    endpointing = get_endpointing_settings(config)
+
     # Create agent session
     session = AgentSession(
         stt=deepgram.STT(model="nova-2"),
@@ -161,7 +218,12 @@ async def entrypoint(ctx: JobContext):
             voice=config.get_voice_id("cartesia"),
             speed="normal" if config.style.pacing == "normal" else config.style.pacing,
         ),
+        min_endpointing_delay=endpointing.min_endpointing_delay,
+        max_endpointing_delay=endpointing.max_endpointing_delay,
+        min_interruption_duration=endpointing.min_interruption_duration,
     )
+    AdaptiveEndpointer(endpointing).attach(session)
+    track_usage(ctx, session, config.agent_type)
 
     # Start the session with function tools
     agent = OutboundCallerAgent(config)
@@ -177,5 +239,6 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             agent_name="outbound-caller-agent",
+            drain_timeout=DRAIN_TIMEOUT,
         )
     )
@@ -0,0 +1,264 @@
+"""
+Replay benchmark - re-drives recorded sessions offline and checks them against a baseline
+
+Trace files are JSON:
+
+    {
+        "agent_type": "customer_service",
+        "config": {"style": {"pacing": "slow"}},
+        "turns": [
+            {
+                "user": "How do I reset my password?",
+                "tool_calls": [{"name": "search_knowledge_base", "args": {"query": "reset password"}}],
+                "reply": "Click Forgot Password on the login page..."
+            }
+        ]
+    }
+
+The LLM, STT and TTS are replaced by deterministic fakes: the fake LLM emits the
+recorded tool calls and reply, and token counts and provider latency are modelled
+from the agent's chat context. Each turn goes through the agent's own
+on_user_turn_completed hook (and so the local intent router) against a stub
+session, and the function tools run for real, so changes to any of them show up
+in the comparison.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Never restore or flush production snapshots, or send real email, while replaying
+os.environ["WORKER_SNAPSHOT_DIR"] = tempfile.mkdtemp(prefix="replay-snapshots-")
+os.environ["SMTP_HOST"] = ""
+
+from livekit.agents import Agent, StopResponse
+from livekit.agents.llm import ChatContext, ChatMessage, FunctionCall, FunctionCallOutput
+
+from config import AgentConfig
+from notifications import get_notifier
+from worker_state import reset_stores
+
+logger = logging.getLogger("replay")
+
+AGENT_MODULES = {
+    "general": ("general_assistant", "GeneralAssistant"),
+    "scheduling": ("scheduling_agent", "SchedulingAgent"),
+    "customer_service": ("customer_service", "CustomerServiceAgent"),
+    "outbound": ("outbound_caller", "OutboundCallerAgent"),
+}
+
+# Deterministic provider model used in place of Deepgram / gpt-4o-mini / Cartesia
+CHARS_PER_TOKEN = 4
+FAKE_STT_MS = 150.0
+FAKE_LLM_TTFT_MS = 300.0
+FAKE_LLM_MS_PER_PROMPT_TOKEN = 0.05
+FAKE_LLM_MS_PER_COMPLETION_TOKEN = 12.0
+FAKE_TTS_MS_PER_CHAR = 0.5
+
+# Record IDs from worker_state.new_record_id are random - mask them so outputs compare stably
+RECORD_ID = re.compile(r"\b([A-Z]+)-[0-9A-F]{8}\b")
+
+DEFAULT_THRESHOLD = 0.10
+# Locally measured stages are sub-millisecond and noisy - ignore jitter below this
+LATENCY_SLACK_MS = 5.0
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _item_text(item) -> str:
+    if item.type == "message":
+        return item.text_content or ""
+    if item.type == "function_call":
+        return f"{item.name}({item.arguments})"
+    return item.output
+
+
+class FakeLLM:
+    """Replays recorded LLM decisions and accounts tokens deterministically"""
+
+    def __init__(self, instructions: str):
+        self.instructions = instructions
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.modeled_ms = 0.0
+
+    def call(self, chat_ctx: ChatContext, completion: str) -> None:
+        """Account one completion whose prompt is the instructions plus the chat context"""
+        prompt = estimate_tokens(self.instructions) + sum(estimate_tokens(_item_text(i)) for i in chat_ctx.items)
+        completion_tokens = estimate_tokens(completion)
+        self.prompt_tokens += prompt
+        self.completion_tokens += completion_tokens
+        self.modeled_ms += (
+            FAKE_LLM_TTFT_MS
+            + prompt * FAKE_LLM_MS_PER_PROMPT_TOKEN
+            + completion_tokens * FAKE_LLM_MS_PER_COMPLETION_TOKEN
+        )
+
+
+class ReplayActivity:
+    """Stands in for the AgentActivity an Agent's hooks reach through agent.session"""
+
+    def __init__(self, agent: Agent):
+        self.agent = agent
+        self.said: list[str] = []
+        self.session = SimpleNamespace(say=self.say)
+
+    def say(self, text: str, *, add_to_chat_ctx: bool = True, **kwargs) -> None:
+        self.said.append(text)
+        if add_to_chat_ctx:
+            self.agent._chat_ctx.add_message(role="assistant", content=text)
+
+    async def update_chat_ctx(self, chat_ctx: ChatContext) -> None:
+        self.agent._chat_ctx = chat_ctx.copy()
+
+
+async def replay_trace(trace: dict) -> dict:
+    """Re-drive one recorded session and return its behaviour, timings and token usage"""
+    agent_type = trace["agent_type"]
+    module_name, class_name = AGENT_MODULES[agent_type]
+    module = importlib.import_module(module_name)
+    reset_stores()
+
+    config = AgentConfig(**{**trace.get("config", {}), "agent_type": agent_type})
+    start = time.perf_counter()
+    agent = getattr(module, class_name)(config)
+    timings = {"agent_init_ms": (time.perf_counter() - start) * 1000, "user_turn_hook_ms": 0.0, "tools_ms": 0.0}
+
+    activity = agent._activity = ReplayActivity(agent)
+    router = getattr(module, "local_router", None)
+    llm = FakeLLM(agent.instructions)
+    tool_calls, tool_outputs, routed = [], [], []
+    stt_ms = tts_ms = 0.0
+
+    for turn in trace["turns"]:
+        stt_ms += FAKE_STT_MS
+        message = ChatMessage(role="user", content=[turn["user"]])
+        # Same flow as AgentActivity: the hook gets a mutable copy, StopResponse ends the turn
+        turn_ctx = agent.chat_ctx.copy()
+        said = len(activity.said)
+        start = time.perf_counter()
+        try:
+            await agent.on_user_turn_completed(turn_ctx, new_message=message)
+        except StopResponse:
+            timings["user_turn_hook_ms"] += (time.perf_counter() - start) * 1000
+            routed.append(router.classify(turn["user"]).intent if router is not None else "stopped")
+            tts_ms += sum(len(text) for text in activity.said[said:]) * FAKE_TTS_MS_PER_CHAR
+            continue
+        timings["user_turn_hook_ms"] += (time.perf_counter() - start) * 1000
+        routed.append(None)
+
+        turn_ctx.items.append(message)
+        calls = turn.get("tool_calls", [])
+        if calls:
+            # First LLM pass decides on the tool calls, second pass sees their outputs
+            llm.call(turn_ctx, json.dumps(calls))
+            for i, call in enumerate(calls):
+                tool = getattr(module, call["name"], None)
+                start = time.perf_counter()
+                output = await tool(None, **call.get("args", {})) if tool else f"<unknown tool {call['name']}>"
+                output = RECORD_ID.sub(r"\1-XXXXXXXX", output)
+                timings["tools_ms"] += (time.perf_counter() - start) * 1000
+                tool_calls.append(call["name"])
+                tool_outputs.append(output)
+                call_id = f"call_{len(tool_calls)}"
+                turn_ctx.insert([
+                    FunctionCall(call_id=call_id, name=call["name"], arguments=json.dumps(call.get("args", {}))),
+                    FunctionCallOutput(call_id=call_id, name=call["name"], output=output, is_error=False),
+                ])
+
+        reply = turn.get("reply", "")
+        llm.call(turn_ctx, reply)
+        turn_ctx.add_message(role="assistant", content=reply)
+        await activity.update_chat_ctx(turn_ctx)
+        tts_ms += len(reply) * FAKE_TTS_MS_PER_CHAR
+
+    timings.update(stt_ms=stt_ms, llm_ms=llm.modeled_ms, tts_ms=tts_ms)
+    return {
+        "tool_calls": tool_calls,
+        "tool_outputs": tool_outputs,
+        "routed": routed,
+        # Roles in the final chat context - a turn that loses its user message shows up here
+        "history": [item.role if item.type == "message" else item.type for item in agent.chat_ctx.items],
+        "timings_ms": {k: round(v, 3) for k, v in timings.items()},
+        "tokens": {"prompt": llm.prompt_tokens, "completion": llm.completion_tokens},
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Return human-readable regressions of a replay result against its baseline"""
+    failures = []
+    for key in ("tool_calls", "tool_outputs", "routed", "history"):
+        if result[key] != baseline[key]:
+            failures.append(f"{key} changed: {baseline[key]!r} -> {result[key]!r}")
+
+    for stage, base_ms in baseline["timings_ms"].items():
+        ms = result["timings_ms"].get(stage, 0.0)
+        if ms > base_ms * (1 + threshold) + LATENCY_SLACK_MS:
+            failures.append(f"{stage} regressed: {base_ms:.1f}ms -> {ms:.1f}ms")
+
+    for kind, base_tokens in baseline["tokens"].items():
+        tokens = result["tokens"].get(kind, 0)
+        if tokens > base_tokens * (1 + threshold):
+            failures.append(f"{kind} tokens regressed: {base_tokens} -> {tokens}")
+    return failures
+
+
+async def run(trace_paths: list[Path], baseline_path: Path, threshold: float, update: bool) -> int:
+    baselines = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    failed = 0
+    changed = False
+
+    for path in trace_paths:
+        result = await replay_trace(json.loads(path.read_text()))
+        name = path.stem
+        if update:
+            baselines[name] = result
+            changed = True
+            print(f"BASELINE  {name}: {result['tokens']} {result['timings_ms']}")
+            continue
+        if name not in baselines:
+            failed += 1
+            print(f"FAIL      {name}: no baseline recorded (run with --update to accept it)")
+            continue
+
+        failures = compare(result, baselines[name], threshold)
+        if failures:
+            failed += 1
+            print(f"FAIL      {name}")
+            for failure in failures:
+                print(f"          - {failure}")
+        else:
+            print(f"ok        {name}: {result['tokens']}")
+
+    await get_notifier().drain()
+    if changed:
+        baseline_path.write_text(json.dumps(baselines, indent=2) + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded sessions offline against a baseline")
+    parser.add_argument("traces", nargs="*", default=["replay_traces"], help="Trace files or directories")
+    parser.add_argument("--baseline", default="replay_traces/baseline.json")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative latency/token regression (default 0.10)")
+    parser.add_argument("--update", action="store_true", help="Overwrite the stored baseline")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    paths = []
+    for item in map(Path, args.traces):
+        paths.extend(sorted(p for p in item.glob("*.json") if p.name != "baseline.json") if item.is_dir() else [item])
+
+    sys.exit(asyncio.run(run(paths, Path(args.baseline), args.threshold, args.update)))
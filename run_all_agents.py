@@ -6,19 +6,27 @@ import sys
 import logging
 from general_assistant import entrypoint as general_entrypoint
 from livekit.agents import cli, WorkerOptions
+from accounting import start_rollup_thread
+from worker_state import DRAIN_TIMEOUT, start_session_reporter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("multi-agent-runner")
 
 if __name__ == "__main__":
     logger.info("Starting LiveKit general assistant agent...")
-    
+
     # Add 'start' command to sys.argv so cli.run_app works
     sys.argv = ["run_all_agents.py", "start"]
-    
-    # Run the general assistant
+
+    # Log active sessions as they change (drain progress after SIGTERM) and keep usage rollups fresh
+    start_session_reporter()
+    start_rollup_thread()
+
+    # Run the general assistant; on SIGTERM the worker stops accepting jobs and
+    # lets active sessions finish for up to drain_timeout seconds
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=general_entrypoint,
+            drain_timeout=DRAIN_TIMEOUT,
         )
     )
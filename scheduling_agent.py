@@ -11,15 +11,19 @@ from livekit.agents import (
     WorkerOptions,
     cli,
     function_tool,
-    FunctionContext,
+    RunContext,
 )
 from livekit.plugins import openai, deepgram, cartesia
 from config import AgentConfig, get_default_config
+from notifications import get_notifier
+from accounting import track_usage
+from endpointing import AdaptiveEndpointer, get_endpointing_settings
+from worker_state import DRAIN_TIMEOUT, new_record_id, register_store, track_session
 
 logger = logging.getLogger("scheduling-agent")
 
 # In-memory storage for demo purposes (replace with real database)
-appointments = []
+appointments = register_store("appointments", [])
 
 
 class SchedulingAgent(Agent):
@@ -59,7 +63,7 @@ class SchedulingAgent(Agent):
 
 @function_tool
 async def check_availability(
-    ctx: FunctionContext,
+    ctx: RunContext,
     date: Annotated[str, "Date in YYYY-MM-DD format"],
     time_preference: Annotated[str, "Preferred time of day: morning, afternoon, or evening"] = "any"
 ) -> str:
@@ -91,7 +95,7 @@ async def check_availability(
 
 @function_tool
 async def book_appointment(
-    ctx: FunctionContext,
+    ctx: RunContext,
     name: Annotated[str, "Customer name"],
     date: Annotated[str, "Appointment date in YYYY-MM-DD format"],
     time: Annotated[str, "Appointment time (e.g., '2:00 PM')"],
@@ -108,7 +112,7 @@ async def book_appointment(
 
     # Create appointment record
     appointment = {
-        "id": len(appointments) + 1,
+        "id": new_record_id("APT"),
         "name": name,
         "date": date,
         "time": time,
@@ -128,14 +132,17 @@ async def book_appointment(
 
 @function_tool
 async def send_confirmation(
-    ctx: FunctionContext,
+    ctx: RunContext,
     email: Annotated[str, "Email address"],
     appointment_details: Annotated[str, "Appointment details to include"]
 ) -> str:
     """Send appointment confirmation email"""
     logger.info(f"Sending confirmation email to {email}")
 
-    # Demo: Just log it (replace with real email service)
+    # Queued for background delivery so the voice turn isn't blocked on SMTP
+    if not get_notifier().enqueue(email, "confirmation", details=appointment_details):
+        return f"A confirmation email with these details is already on its way to {email}."
+
     return f"Confirmation email sent to {email} with the appointment details."
 
 
@@ -143,6 +150,9 @@ async def entrypoint(ctx: JobContext):
     """Main entry point for the agent"""
     logger.info(f"Connecting to room: {ctx.room.name}")
     await ctx.connect()
+    track_session(ctx)
+    # Deliver queued emails before the job process exits
+    ctx.add_shutdown_callback(lambda: get_notifier().drain())
 
     # Load configuration
     config_data = ctx.job.metadata if hasattr(ctx.job, 'metadata') else {}
@@ -151,6 +161,9 @@ async def entrypoint(ctx: JobContext):
 
     logger.info(f"Starting scheduling agent with config: {config.model_dump()}")
 
+    # Turn detection timing follows the configured pacing and adapts to the caller
+    endpointing = get_endpointing_settings(config)
+
     # Create agent session
     session = AgentSession(
         stt=deepgram.STT(model="nova-2"),
@@ -159,7 +172,12 @@ async def entrypoint(ctx: JobContext):
             voice=config.get_voice_id("cartesia"),
             speed="normal" if config.style.pacing == "normal" else config.style.pacing,
         ),
+        min_endpointing_delay=endpointing.min_endpointing_delay,
+        max_endpointing_delay=endpointing.max_endpointing_delay,
+        min_interruption_duration=endpointing.min_interruption_duration,
     )
+    AdaptiveEndpointer(endpointing).attach(session)
+    track_usage(ctx, session, config.agent_type)
 
     # Start the session with function tools
     agent = SchedulingAgent(config)
@@ -175,5 +193,6 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             agent_name="scheduling-agent",
+            drain_timeout=DRAIN_TIMEOUT,
         )
     )
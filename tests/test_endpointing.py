@@ -0,0 +1,135 @@
+"""
+Endpointing settings and online adaptation tests
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from config import AgentConfig, ConversationalStyle
+from endpointing import (
+    AGENT_TYPE_EXTRA_DELAY,
+    EMPATHETIC_EXTRA_DELAY,
+    MAX_INTRA_TURN_PAUSE,
+    PACING_ENDPOINTING,
+    PAUSE_MARGIN,
+    PAUSE_WINDOW,
+    AdaptiveEndpointer,
+    get_endpointing_settings,
+)
+
+
+def settings_for(agent_type="general", **style):
+    return get_endpointing_settings(AgentConfig(agent_type=agent_type, style=ConversationalStyle(**style)))
+
+
+@pytest.mark.parametrize("pacing", ["slow", "normal", "fast"])
+def test_settings_follow_pacing(pacing):
+    settings = settings_for(pacing=pacing)
+    base = PACING_ENDPOINTING[pacing]
+    assert settings.min_endpointing_delay == base["min_endpointing_delay"]
+    assert settings.max_endpointing_delay == base["max_endpointing_delay"]
+    assert settings.min_interruption_duration == base["min_interruption_duration"]
+
+
+def test_settings_add_agent_type_and_empathy():
+    settings = settings_for("customer_service", pacing="normal", tone="empathetic")
+    expected = 0.5 + AGENT_TYPE_EXTRA_DELAY["customer_service"] + EMPATHETIC_EXTRA_DELAY
+    assert settings.min_endpointing_delay == pytest.approx(expected)
+
+
+def test_settings_bounds():
+    fast = settings_for(pacing="fast")
+    assert fast.floor == 0.2  # Half of 0.3 is below the absolute floor
+    assert fast.ceiling == pytest.approx(0.6)
+
+    slow = settings_for("scheduling", pacing="slow", tone="empathetic")
+    assert slow.floor == pytest.approx(slow.min_endpointing_delay * 0.5)
+    assert slow.ceiling == pytest.approx(slow.min_endpointing_delay * 2.0)
+    assert slow.ceiling <= slow.max_endpointing_delay
+
+
+def test_pauses_need_three_samples():
+    endpointer = AdaptiveEndpointer(settings_for())
+    assert endpointer.observe_pause(0.8) == 0.5
+    assert endpointer.observe_pause(0.8) == 0.5
+    # p90 of [0.8, 0.8, 0.8] + margin, reached 30% of the way
+    assert endpointer.observe_pause(0.8) == pytest.approx(0.7 * 0.5 + 0.3 * (0.8 + PAUSE_MARGIN))
+
+
+def test_pauses_are_clamped_to_bounds():
+    settings = settings_for()
+    long_pauses = AdaptiveEndpointer(settings)
+    for _ in range(50):
+        long_pauses.observe_pause(2.5)
+    assert settings.ceiling - 0.002 <= long_pauses.delay <= settings.ceiling
+
+    short_pauses = AdaptiveEndpointer(settings)
+    for _ in range(50):
+        short_pauses.observe_pause(0.05)
+    assert settings.floor <= short_pauses.delay <= settings.floor + 0.002
+
+
+def test_out_of_range_pauses_are_ignored_and_window_is_bounded():
+    endpointer = AdaptiveEndpointer(settings_for())
+    endpointer.observe_pause(0)
+    endpointer.observe_pause(MAX_INTRA_TURN_PAUSE + 0.1)
+    assert endpointer.pauses == []
+
+    for i in range(PAUSE_WINDOW + 5):
+        endpointer.observe_pause(0.1 + i * 0.01)
+    assert len(endpointer.pauses) == PAUSE_WINDOW
+    assert endpointer.pauses[0] == pytest.approx(0.15)
+
+
+def test_cutoff_backs_off_up_to_ceiling():
+    settings = settings_for()
+    endpointer = AdaptiveEndpointer(settings)
+    assert endpointer.observe_cutoff() == pytest.approx(0.5 + PAUSE_MARGIN)
+    for _ in range(20):
+        endpointer.observe_cutoff()
+    assert endpointer.delay == settings.ceiling
+
+
+def fake_session(delay):
+    recognition = SimpleNamespace(_min_endpointing_delay=delay)
+    session = SimpleNamespace(
+        options=SimpleNamespace(min_endpointing_delay=delay),
+        _activity=SimpleNamespace(_audio_recognition=recognition),
+        on=lambda event, callback: None,
+    )
+    return session, recognition
+
+
+def state(old, new):
+    return SimpleNamespace(old_state=old, new_state=new)
+
+
+def test_adapted_delay_reaches_running_activity(monkeypatch):
+    settings = settings_for()
+    session, recognition = fake_session(settings.min_endpointing_delay)
+    endpointer = AdaptiveEndpointer(settings).attach(session)
+    endpointer.pauses = [0.9, 0.9]
+
+    times = iter([10.0, 10.9])
+    monkeypatch.setattr("endpointing.time.monotonic", lambda: next(times))
+    endpointer._on_user_state_changed(state("speaking", "listening"))
+    endpointer._on_user_state_changed(state("listening", "speaking"))
+
+    assert endpointer.delay > settings.min_endpointing_delay
+    assert recognition._min_endpointing_delay == endpointer.delay
+    assert session.options.min_endpointing_delay == endpointer.delay
+
+
+def test_turn_log_reports_delay_in_use(monkeypatch, caplog):
+    session, recognition = fake_session(0.5)
+    endpointer = AdaptiveEndpointer(settings_for()).attach(session)
+    endpointer.delay = 0.9  # Not yet applied to the session
+
+    times = iter([10.0, 10.7])
+    monkeypatch.setattr("endpointing.time.monotonic", lambda: next(times))
+    caplog.set_level("INFO", logger="endpointing")
+    endpointer._on_user_state_changed(state("speaking", "listening"))
+    endpointer._on_agent_state_changed(state("thinking", "speaking"))
+
+    assert "response 700ms" in caplog.text
+    assert "endpointing delay 500ms (+0ms vs library default" in caplog.text
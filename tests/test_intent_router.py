@@ -0,0 +1,52 @@
+"""
+Local intent router tests against the agents' production routers
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from livekit.agents import StopResponse
+from livekit.agents.llm import ChatContext, ChatMessage
+
+from config import AgentConfig
+from intent_router import AGENT_ROUTERS, EVAL_SAMPLES, IntentRouter, evaluate, load_agent_router
+
+
+@pytest.mark.parametrize("agent_type", sorted(AGENT_ROUTERS))
+def test_agent_routers_never_answer_wrongly(agent_type):
+    report = evaluate(load_agent_router(agent_type), EVAL_SAMPLES[agent_type])
+    assert report["precision"] == 1.0
+    assert report["recall"] >= 0.8
+
+
+def test_colliding_intents_are_rejected():
+    router = IntentRouter()
+    router.add_intent("features", "answer")
+    with pytest.raises(ValueError):
+        router.add_intent("features", "other answer")
+
+
+class StubActivity:
+    """Just enough of AgentActivity for on_user_turn_completed"""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.said = []
+        self.session = SimpleNamespace(say=lambda text: self.said.append(text))
+
+    async def update_chat_ctx(self, chat_ctx):
+        self.agent._chat_ctx = chat_ctx.copy()
+
+
+def test_routed_turn_keeps_the_question_in_history():
+    from customer_service import CustomerServiceAgent
+
+    agent = CustomerServiceAgent(AgentConfig(agent_type="customer_service"))
+    activity = agent._activity = StubActivity(agent)
+    message = ChatMessage(role="user", content=["how do I reset my password"])
+
+    with pytest.raises(StopResponse):
+        asyncio.run(agent.on_user_turn_completed(agent.chat_ctx.copy(), message))
+
+    assert activity.said and "Forgot Password" in activity.said[0]
+    assert agent.chat_ctx.items[-1].id == message.id
@@ -0,0 +1,148 @@
+"""
+Notification queue tests against the local SMTP sink
+"""
+import asyncio
+import time
+
+import notifications
+from notifications import Notifier, SMTPSink, SMTPTransport
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _with_sink(test):
+    sink = SMTPSink()
+    port = await sink.start()
+    try:
+        return await test(sink, lambda **kw: SMTPTransport("127.0.0.1", port, **{"use_tls": False, **kw}))
+    finally:
+        await sink.stop()
+
+
+class FlakyTransport:
+    """Fails the first `failures` sends, then delegates to a real transport"""
+
+    def __init__(self, transport, failures: int):
+        self.transport = transport
+        self.failures = failures
+        self.calls = 0
+
+    def send(self, notification):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise OSError("connection reset")
+        self.transport.send(notification)
+
+    def close(self):
+        self.transport.close()
+
+
+def test_delivers_rendered_emails():
+    async def test(sink, transport):
+        notifier = Notifier(transport_factory=transport, workers=2)
+        assert notifier.enqueue("a@example.com", "confirmation", details="Demo on 2026-07-14 at 2:00 PM")
+        assert notifier.enqueue("b@example.com", "info", info_type="case_study", content="Stories")
+        await notifier.drain()
+
+        assert sink.received == 2
+        assert notifier.sent == 2
+        messages = b"\n".join(sink.messages)
+        assert b"Subject: Your Mind Call Flow appointment is confirmed" in messages
+        assert b"Subject: Mind Call Flow: case study" in messages
+        assert b"Demo on 2026-07-14 at 2:00 PM" in messages
+
+    run(_with_sink(test))
+
+
+def test_retries_failed_sends(monkeypatch):
+    monkeypatch.setattr(notifications, "RETRY_BASE_DELAY", 0.01)
+
+    async def test(sink, transport):
+        flaky = FlakyTransport(transport(), failures=2)
+        notifier = Notifier(transport_factory=lambda: flaky, workers=1, max_retries=3)
+        notifier.enqueue("a@example.com", "confirmation", details="x")
+        await notifier.drain()
+
+        assert flaky.calls == 3
+        assert sink.received == 1
+        assert notifier.failed == 0
+
+    run(_with_sink(test))
+
+
+def test_gives_up_and_allows_resend(monkeypatch):
+    monkeypatch.setattr(notifications, "RETRY_BASE_DELAY", 0.01)
+
+    async def test(sink, transport):
+        flaky = FlakyTransport(transport(), failures=2)
+        notifier = Notifier(transport_factory=lambda: flaky, workers=1, max_retries=1)
+        notifier.enqueue("a@example.com", "confirmation", details="x")
+        await notifier.drain()
+        assert notifier.failed == 1
+        assert sink.received == 0
+
+        # A failed email does not count as sent, so the caller can ask again
+        assert notifier.enqueue("a@example.com", "confirmation", details="x")
+        await notifier.drain()
+        assert sink.received == 1
+
+    run(_with_sink(test))
+
+
+def test_deduplicates_queued_and_delivered_emails():
+    async def test(sink, transport):
+        notifier = Notifier(transport_factory=transport, workers=1)
+        assert notifier.enqueue("a@example.com", "confirmation", details="x")
+        assert not notifier.enqueue("A@example.com", "confirmation", details="x")
+        await notifier.drain()
+        assert not notifier.enqueue("a@example.com", "confirmation", details="x")
+        assert notifier.enqueue("a@example.com", "confirmation", details="y")
+        await notifier.drain()
+
+        assert sink.received == 2
+
+    run(_with_sink(test))
+
+
+def test_rate_limit_spaces_out_sends():
+    async def test(sink, transport):
+        # 600/minute = 10/second with a burst of 10, so 15 emails need ~0.5s
+        notifier = Notifier(transport_factory=transport, workers=4, rate_per_minute=600)
+        start = time.monotonic()
+        for i in range(15):
+            notifier.enqueue(f"user{i}@example.com", "confirmation", details="x")
+        await notifier.drain()
+
+        assert sink.received == 15
+        assert time.monotonic() - start >= 0.45
+
+    run(_with_sink(test))
+
+
+def test_failed_starttls_never_sends_plaintext(monkeypatch):
+    monkeypatch.setattr(notifications, "RETRY_BASE_DELAY", 0.01)
+
+    async def test(sink, transport):
+        # The sink does not advertise STARTTLS, so every connection attempt must fail
+        notifier = Notifier(transport_factory=lambda: transport(use_tls=True), workers=1, max_retries=2)
+        notifier.enqueue("a@example.com", "confirmation", details="x")
+        await notifier.drain()
+
+        assert notifier.failed == 1
+        assert sink.received == 0
+
+    run(_with_sink(test))
+
+
+def test_enqueue_does_not_block_on_delivery():
+    async def test(sink, transport):
+        notifier = Notifier(transport_factory=transport, workers=2, rate_per_minute=60)
+        start = time.perf_counter()
+        for i in range(500):
+            notifier.enqueue(f"user{i}@example.com", "confirmation", details="x")
+        assert time.perf_counter() - start < 0.5
+        await notifier.drain(timeout=0.1)
+
+    run(_with_sink(test))
@@ -0,0 +1,37 @@
+"""
+Snapshot store tests
+"""
+import json
+
+import worker_state
+from worker_state import flush_stores, new_record_id, register_store
+
+
+def test_record_ids_are_unique():
+    ids = {new_record_id("TICKET") for _ in range(1000)}
+    assert len(ids) == 1000
+    assert all(i.startswith("TICKET-") for i in ids)
+
+
+def test_restore_skips_duplicate_ids_and_torn_lines(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker_state, "SNAPSHOT_DIR", tmp_path)
+    monkeypatch.setattr(worker_state, "_stores", {})
+    monkeypatch.setattr(worker_state, "_flushed", {})
+    (tmp_path / "tickets.jsonl").write_text(
+        json.dumps({"id": "TICKET-1001", "by": "first"}) + "\n"
+        + json.dumps({"id": "TICKET-1001", "by": "second"}) + "\n"
+        + json.dumps({"note": "no id"}) + "\n"
+        + '{"id": "TICK'
+    )
+
+    tickets = register_store("tickets", [])
+    assert tickets == [{"id": "TICKET-1001", "by": "first"}, {"note": "no id"}]
+
+    # Only records created after the restore are appended, never onto the torn line
+    new_ticket = {"id": new_record_id("TICKET")}
+    tickets.append(new_ticket)
+    assert flush_stores() == 1
+    assert flush_stores() == 0
+
+    monkeypatch.setattr(worker_state, "_stores", {})
+    assert register_store("tickets", [])[-1] == new_ticket
@@ -0,0 +1,173 @@
+"""
+Worker state module - drain reporting and on-disk snapshots of in-memory tool records
+"""
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger("worker-state")
+
+# Shared between the outgoing worker and its replacement (mount as a volume in production)
+SNAPSHOT_DIR = Path(os.getenv("WORKER_SNAPSHOT_DIR", "snapshots"))
+
+# How long a draining worker lets active sessions finish before shutting down
+DRAIN_TIMEOUT = int(os.getenv("WORKER_DRAIN_TIMEOUT", "600"))
+SESSION_REPORT_INTERVAL = 5.0
+
+# Identifies this worker; set by the runner process and inherited by its job processes
+WORKER_ID = os.environ.setdefault("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+
+# Registered record lists, and how many of each are already written to disk
+_stores: dict[str, list] = {}
+_flushed: dict[str, int] = {}
+
+
+def _store_path(name: str) -> Path:
+    return SNAPSHOT_DIR / f"{name}.jsonl"
+
+
+def _active_dir() -> Path:
+    # Local to this worker - never in the snapshot dir shared with the replacement
+    return Path(tempfile.gettempdir()) / "mind-call-flow-sessions" / WORKER_ID
+
+
+def register_store(name: str, records: list) -> list:
+    """Register an in-memory record list for flushing and restore it from the last snapshot"""
+    path = _store_path(name)
+    if path.exists():
+        restored, seen = [], set()
+        with path.open() as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A worker killed mid-write can leave a torn last line
+                    logger.warning(f"Skipping corrupt record in {path}")
+                    continue
+                # Older snapshots hold IDs that concurrent job processes derived from len(store)
+                record_id = record.get("id")
+                if record_id is not None:
+                    if record_id in seen:
+                        logger.warning(f"Skipping duplicate {name} record {record_id} in {path}")
+                        continue
+                    seen.add(record_id)
+                restored.append(record)
+        records[:0] = restored
+        logger.info(f"Restored {len(restored)} {name} records from snapshot")
+
+    _stores[name] = records
+    _flushed[name] = len(records)
+    return records
+
+
+def new_record_id(prefix: str) -> str:
+    """Record ID that stays unique across the job processes sharing a snapshot"""
+    return f"{prefix}-{uuid.uuid4().hex[:8].upper()}"
+
+
+def _ends_torn(path: Path) -> bool:
+    with path.open("rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def flush_stores() -> int:
+    """Append records created since the last flush to their snapshot files"""
+    total = 0
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    for name, records in _stores.items():
+        pending = records[_flushed[name]:]
+        if not pending:
+            continue
+        path = _store_path(name)
+        with path.open("a") as f:
+            if _ends_torn(path):
+                # Never glue a new record onto a line left torn by a killed worker
+                f.write("\n")
+            for record in pending:
+                f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        _flushed[name] = len(records)
+        total += len(pending)
+        logger.info(f"Flushed {len(pending)} {name} records")
+    return total
+
+
+def reset_stores() -> None:
+    """Empty every registered store in place (used by offline replay)"""
+    for name, records in _stores.items():
+        records.clear()
+        _flushed[name] = 0
+
+
+def track_session(ctx) -> None:
+    """Mark a job's session as active until it shuts down, then flush its records"""
+    marker = _active_dir() / ctx.job.id
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.write_text(str(os.getpid()))
+
+    async def _on_shutdown():
+        try:
+            flush_stores()
+        finally:
+            marker.unlink(missing_ok=True)
+
+    ctx.add_shutdown_callback(_on_shutdown)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def active_session_count() -> int:
+    """Number of sessions still running in this worker's job processes"""
+    active = _active_dir()
+    if not active.exists():
+        return 0
+    count = 0
+    for marker in active.iterdir():
+        try:
+            alive = _pid_alive(int(marker.read_text()))
+        except (OSError, ValueError):
+            alive = False
+        if alive:
+            count += 1
+        else:
+            # Left behind by a job process that was killed without running shutdown callbacks
+            marker.unlink(missing_ok=True)
+    return count
+
+
+def start_session_reporter(interval: float = SESSION_REPORT_INTERVAL) -> threading.Thread:
+    """Log the active session count whenever it changes (drain progress during shutdown)"""
+
+    def _report():
+        last = None
+        while True:
+            count = active_session_count()
+            if count != last:
+                logger.info(f"Worker {WORKER_ID}: {count} active sessions")
+                last = count
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_report, name="session-reporter", daemon=True)
+    thread.start()
+    return thread